@@ -0,0 +1,37 @@
+from n_gram_classifier import *
+"""
+Prune the n-gram vocabulary with the native feature selector and report how
+much the model shrank versus how much accuracy changed
+"""
+
+
+def main():
+    # Set up paths
+    data_dir = Path("data")
+    train_file = data_dir / "eng.imdb.train.jsonl"
+    test_file = data_dir / "eng.imdb.test.jsonl"
+
+    # Load data
+    print("Loading datasets...")
+    train_data = load_jsonl(train_file)
+    test_data = load_jsonl(test_file)
+    print(f"Loaded {len(train_data)} training reviews")
+    print(f"Loaded {len(test_data)} test reviews")
+
+    # Initialize processor
+    processor = NgramDocumentProcessor(n_size=6)
+
+    # Keep n-grams as lists so the selected vocabulary matches the features
+    train_ngrams, train_labels = process_dataset(processor, train_data, "training", as_ngrams=True)
+    test_ngrams, test_labels = process_dataset(processor, test_data, "test", as_ngrams=True)
+
+    results = feature_selection_report(train_ngrams, train_labels, test_ngrams, test_labels,
+                                       k_per_label=50000,
+                                       scores=("chi2", "log_count_ratio", "mutual_info"))
+
+    # Save the chi2-pruned model; it can be reloaded with joblib.load
+    size = save_model(results["chi2"]["classifier"], "ngram_nb_selected.joblib")
+    print(f"Saved pruned model ({size / 1e6:.1f} MB) to ngram_nb_selected.joblib")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+// include/cpp_n_gram_tokenizer/core/feature_selector.hpp
+#pragma once
+
+#include <cstdint>
+#include <string>
+#include <string_view>
+#include <vector>
+#include <tuple>
+#include <utility>
+
+namespace cpp_n_gram_tokenizer {
+
+// Scoring functions used to rank n-grams against a label
+enum class FeatureScore {
+    ChiSquare,
+    LogCountRatio,
+    MutualInformation
+};
+
+class FeatureSelector {
+public:
+    // num_threads == 0 uses std::thread::hardware_concurrency()
+    explicit FeatureSelector(size_t num_threads = 0, double alpha = 1.0);
+
+    // Public interface
+    void fit(const std::vector<std::vector<std::string>>& docs, const std::vector<int>& labels);
+    void fit_results(const std::vector<std::tuple<std::string, std::vector<std::string>, int>>& results);
+    // Flat corpus: text holds every n-gram back to back, ngram_lengths their
+    // byte lengths, and document j holds n-grams [doc_ends[j-1], doc_ends[j])
+    void fit_flat(const std::string& text, const std::vector<uint32_t>& ngram_lengths,
+                  const std::vector<size_t>& doc_ends, const std::vector<int>& labels);
+    std::vector<std::pair<std::string, double>> top_features(int label, size_t k, FeatureScore score) const;
+    std::vector<std::string> select(size_t k_per_label, FeatureScore score) const;
+
+    std::vector<int> labels() const { return label_values; }
+    size_t vocabulary_size() const { return feature_ends.size(); }
+    size_t num_documents() const { return total_docs; }
+
+private:
+    // for_each_ngram(d, visit) calls visit(std::string_view) for every n-gram of document d
+    template <typename ForEachNgram>
+    void fit_impl(const std::vector<int>& labels, ForEachNgram for_each_ngram);
+    std::string_view feature_name(uint32_t feature) const;
+    double score_feature(uint32_t feature, size_t label_idx, FeatureScore score) const;
+    bool is_associated(uint32_t feature, size_t label_idx) const;
+    uint64_t document_frequency(uint32_t feature) const;
+    size_t label_index(int label) const;
+
+    size_t n_threads;
+    double smoothing;
+    std::vector<int> label_values;
+    std::vector<uint64_t> label_docs;
+    std::vector<uint64_t> label_terms;
+    uint64_t total_docs = 0;
+    // Distinct n-grams back to back in feature id order; feature i ends at
+    // feature_ends[i]. Per-label counts live in flat arrays indexed by
+    // feature id * number of labels + label index
+    std::string feature_text;
+    std::vector<size_t> feature_ends;
+    std::vector<uint32_t> doc_counts;   // documents of each label containing the n-gram
+    std::vector<uint64_t> term_counts;  // occurrences of the n-gram in each label
+};
+
+} // namespace cpp_n_gram_tokenizer
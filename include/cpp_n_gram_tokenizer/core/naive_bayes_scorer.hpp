@@ -0,0 +1,49 @@
+// include/cpp_n_gram_tokenizer/core/naive_bayes_scorer.hpp
+#pragma once
+
+#include <string>
+#include <string_view>
+#include <vector>
+#include <unordered_map>
+#include <nlohmann/json.hpp>
+#include "cpp_n_gram_tokenizer/core/ngram_tokenizer.hpp"
+
+namespace cpp_n_gram_tokenizer {
+
+// Scores raw text with an exported TF-IDF + MultinomialNB model, looking up
+// each n-gram as it is extracted. Follows sklearn's arithmetic order so
+// predictions match the Python pipeline.
+class NaiveBayesScorer {
+public:
+    explicit NaiveBayesScorer(const std::string& model_path);
+
+    // vocabulary keys view feature_names, so a copy would dangle
+    NaiveBayesScorer(const NaiveBayesScorer&) = delete;
+    NaiveBayesScorer& operator=(const NaiveBayesScorer&) = delete;
+
+    // Public interface
+    int predict(const std::string& text) const;
+    std::vector<double> joint_log_likelihood(const std::string& text) const;
+    std::vector<int> predict_batch(const std::vector<std::string>& texts, size_t num_threads = 0) const;
+
+    const std::vector<int>& classes() const { return class_labels; }
+    size_t num_features() const { return feature_names.size(); }
+    size_t ngram_size() const { return tokenizer.ngram_size(); }
+
+private:
+    explicit NaiveBayesScorer(const nlohmann::json& model);
+
+    std::vector<std::pair<uint32_t, double>> tfidf_row(const std::string& text) const;
+
+    NgramTokenizer tokenizer;
+    std::vector<std::string> feature_names;                    // owns the vocabulary keys
+    std::unordered_map<std::string_view, uint32_t> vocabulary; // views into feature_names
+    std::vector<double> idf;                                   // empty when use_idf=False
+    std::vector<double> feature_log_prob;                      // features x classes, row-major
+    std::vector<double> class_log_prior;
+    std::vector<int> class_labels;
+    std::string norm;
+    bool sublinear_tf;
+};
+
+} // namespace cpp_n_gram_tokenizer
@@ -1,9 +1,14 @@
 // include/cpp_n_gram_tokenizer/core/ngram_tokenizer.hpp
 #pragma once
 
+#include <array>
+#include <cstdint>
+#include <memory>
 #include <string>
+#include <string_view>
 #include <vector>
 #include <tuple>
+#include <unordered_map>
 #include <nlohmann/json.hpp>
 
 namespace cpp_n_gram_tokenizer {
@@ -16,12 +21,57 @@ public:
     std::vector<std::string> tokenize_text(const std::string& json_line);
     std::vector<std::tuple<std::string, std::vector<std::string>, int>> process_file(const std::string& filename);
     
+    // Dense integer encoding: each n-gram maps to an exact ID in [0, id_space_size())
+    // through a character-to-index table. Index 0 is reserved for characters
+    // outside the alphabet, which decode to U+FFFD.
+    struct Alphabet {
+        Alphabet() = default;
+        // char_to_index keys view index_to_char, so a copy would dangle
+        Alphabet(const Alphabet&) = delete;
+        Alphabet& operator=(const Alphabet&) = delete;
+
+        std::vector<std::string> index_to_char;
+        std::array<uint32_t, 256> byte_index{};                     // single-byte characters
+        std::unordered_map<std::string_view, uint32_t> char_to_index; // multi-byte characters
+        int64_t id_space = 0;
+    };
+    
+    void fit_alphabet(const std::vector<std::string>& texts, size_t max_size = 0);
+    void set_alphabet(const std::vector<std::string>& chars);
+    std::vector<std::string> alphabet() const;
+    // The table is never modified in place, so a snapshot stays valid after set_alphabet
+    std::shared_ptr<const Alphabet> alphabet_table() const;
+    std::vector<int64_t> encode_text(const std::string& json_line) const;
+    std::vector<int64_t> encode_text(const std::string& json_line, const Alphabet& table) const;
+    std::vector<int64_t> encode_ngrams(const std::string& text) const;
+    std::vector<int64_t> encode_ngrams(const std::string& text, const Alphabet& table) const;
+    std::string decode_id(int64_t id) const;
+    int64_t id_space_size() const { return char_table ? char_table->id_space : 0; }
+    size_t ngram_size() const { return n_size; }
+    
+    // Calls visit(std::string_view) for every n-gram of text without copying it
+    template <typename Visitor>
+    void for_each_ngram(const std::string& text, Visitor&& visit) const {
+        std::string normalized = normalize_text(text);
+        std::vector<size_t> positions = char_positions(normalized);
+        std::string_view view(normalized);
+        for (size_t i = 0; i + n_size <= positions.size(); ++i) {
+            size_t start = positions[i];
+            size_t end = (i + n_size < positions.size()) ? 
+                        positions[i + n_size] : 
+                        normalized.length();
+            visit(view.substr(start, end - start));
+        }
+    }
+    
 protected:
-    std::string normalize_text(const std::string& text);
-    std::vector<std::string> extract_ngrams(const std::string& text);
+    std::string normalize_text(const std::string& text) const;
+    std::vector<size_t> char_positions(const std::string& normalized) const;
+    std::vector<std::string> extract_ngrams(const std::string& text) const;
     
 private:
     size_t n_size;
+    std::shared_ptr<const Alphabet> char_table;
 };
 
 } // namespace cpp_n_gram_tokenizer
\ No newline at end of file
@@ -1,11 +1,13 @@
 # naive_bayes_pipeline.py
 
 import json
+import pickle
 from pathlib import Path
+import joblib
 from build_finder import find_cpp_module
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.naive_bayes import MultinomialNB
-from sklearn.metrics import classification_report
+from sklearn.metrics import accuracy_score, classification_report
 from sklearn.pipeline import Pipeline
 
 class NgramDocumentProcessor:
@@ -15,10 +17,15 @@ class NgramDocumentProcessor:
         # Find and import C++ module
         find_cpp_module()
         import cpp_ngram
+        self.n_size = n_size
         self.tokenizer = cpp_ngram.NgramTokenizer(n_size)
     
     def process_text(self, text):
         """Process a single text document."""
+        return ' '.join(self.process_ngrams(text))
+
+    def process_ngrams(self, text):
+        """Process a single text document into its list of n-grams."""
         try:
             # Ensure text is properly UTF-8 encoded
             if isinstance(text, str):
@@ -36,18 +43,17 @@ class NgramDocumentProcessor:
             json_str = json.dumps(json_input, ensure_ascii=False)
             
             # Get n-grams from C++ tokenizer
-            ngrams = self.tokenizer.tokenize_text(json_str)
-            return ' '.join(ngrams)
+            return self.tokenizer.tokenize_text(json_str)
             
         except UnicodeError as e:
             print(f"Unicode Error: {e}")
             print(f"Problematic text preview: {text[:100]}")
-            return ""
+            return []
         except Exception as e:
             print(f"Processing Error: {str(e)}")
             print(f"Error type: {type(e)}")
             print(f"Problematic text preview: {text[:100]}")
-            return ""
+            return []
 
 def load_jsonl(file_path: Path) -> list:
     """Load and parse a JSONL file."""
@@ -61,8 +67,26 @@ def load_jsonl(file_path: Path) -> list:
                 continue
     return data
 
-def create_classifier():
-    """Create the classification pipeline."""
+def ngram_analyzer(ngrams):
+    """Use the C++ n-grams as vectorizer features as-is (module level so models pickle)."""
+    return ngrams
+
+def create_classifier(ngram_features=False, vocabulary=None):
+    """Create the classification pipeline.
+
+    With ngram_features (implied by vocabulary) the pipeline expects lists of
+    n-grams from process_ngrams() and uses each n-gram as a feature.
+    """
+    if ngram_features or vocabulary is not None:
+        return Pipeline([
+            ('tfidf', TfidfVectorizer(
+                analyzer=ngram_analyzer,
+                vocabulary=vocabulary,
+                min_df=2,
+                max_df=0.95
+            )),
+            ('clf', MultinomialNB(alpha=0.1))
+        ])
     return Pipeline([
         ('tfidf', TfidfVectorizer(
             ngram_range=(1, 1),
@@ -74,15 +98,16 @@ def create_classifier():
         ('clf', MultinomialNB(alpha=0.1))
     ])
 
-def process_dataset(processor, data, purpose="training"):
+def process_dataset(processor, data, purpose="training", as_ngrams=False):
     """Process a dataset and prepare it for classification."""
     texts = []
     labels = []
+    process = processor.process_ngrams if as_ngrams else processor.process_text
     
     print(f"\nProcessing {purpose} data...")
     for i, review in enumerate(data, 1):
         try:
-            ngram_text = processor.process_text(review["text"])
+            ngram_text = process(review["text"])
             if ngram_text:
                 texts.append(ngram_text)
                 labels.append(review["label"])
@@ -101,6 +126,108 @@ def evaluate_model(classifier, test_texts, test_labels):
                               target_names=['Negative', 'Positive']))
     return predictions
 
+def fit_feature_selector(train_ngrams, train_labels, num_threads=0):
+    """Count per-label n-gram statistics with the native feature selector."""
+    import cpp_ngram
+    selector = cpp_ngram.FeatureSelector(num_threads)
+    selector.fit(train_ngrams, train_labels)
+    return selector
+
+def select_features(selector, k_per_label=50000, score="chi2"):
+    """Select the top k n-grams per label from a fitted feature selector.
+
+    score is one of "chi2", "log_count_ratio" or "mutual_info". Returns a
+    sorted vocabulary that can be passed to create_classifier().
+    """
+    import cpp_ngram
+    vocabulary = selector.select(k_per_label, getattr(cpp_ngram.FeatureScore, score.upper()))
+    print(f"Selected {len(vocabulary)} of {selector.vocabulary_size} n-grams "
+          f"({score}, top {k_per_label} per label)")
+    return vocabulary
+
+def save_model(classifier, path):
+    """Save a fitted pipeline with joblib and return the file size in bytes."""
+    path = Path(path)
+    joblib.dump(classifier, path)
+    return path.stat().st_size
+
+def model_size(classifier):
+    """In-memory size of a fitted pipeline, measured as its pickled size in bytes."""
+    return len(pickle.dumps(classifier, protocol=pickle.HIGHEST_PROTOCOL))
+
+def feature_selection_report(train_ngrams, train_labels, test_ngrams, test_labels,
+                             k_per_label=50000, scores=("chi2",), selector=None):
+    """Compare a full n-gram model against models trained on selected vocabularies.
+
+    Returns a dict keyed by "full" and each score, holding the fitted
+    classifier alongside its vocabulary size, model size and accuracy.
+    """
+    if selector is None:
+        selector = fit_feature_selector(train_ngrams, train_labels)
+    candidates = [("full", create_classifier(ngram_features=True))]
+    for score in scores:
+        vocabulary = select_features(selector, k_per_label, score)
+        candidates.append((score, create_classifier(vocabulary=vocabulary)))
+
+    results = {}
+    for name, classifier in candidates:
+        classifier.fit(train_ngrams, train_labels)
+        predictions = classifier.predict(test_ngrams)
+        results[name] = {
+            "classifier": classifier,
+            "vocabulary_size": len(classifier.named_steps['tfidf'].vocabulary_),
+            "model_bytes": model_size(classifier),
+            "accuracy": accuracy_score(test_labels, predictions),
+        }
+
+    full = results["full"]
+    print("\nFeature Selection Report:")
+    print(f"{'':16}{'vocabulary':>12}{'model MB':>12}{'accuracy':>10}{'shrink':>8}{'change':>9}")
+    for name, row in results.items():
+        shrink = full['model_bytes'] / max(row['model_bytes'], 1)
+        change = row['accuracy'] - full['accuracy']
+        print(f"{name:16}{row['vocabulary_size']:>12}{row['model_bytes'] / 1e6:>12.1f}"
+              f"{row['accuracy']:>10.4f}{shrink:>7.1f}x{change:>+9.4f}")
+    return results
+
+def export_scoring_model(classifier, path, n_size):
+    """Export a fitted n-gram feature pipeline for cpp_ngram.NaiveBayesScorer.
+
+    Writes the vocabulary (ordered by feature index), IDF weights, TF-IDF
+    settings and the MultinomialNB log-probabilities as JSON.
+    """
+    tfidf = classifier.named_steps['tfidf']
+    clf = classifier.named_steps['clf']
+    if tfidf.analyzer is not ngram_analyzer:
+        raise ValueError("Native scoring needs an n-gram feature pipeline; "
+                         "use create_classifier(ngram_features=True)")
+
+    vocabulary = [None] * len(tfidf.vocabulary_)
+    for ngram, index in tfidf.vocabulary_.items():
+        vocabulary[index] = ngram
+
+    model = {
+        "n_size": n_size,
+        "vocabulary": vocabulary,
+        "idf": tfidf.idf_.tolist() if tfidf.use_idf else None,
+        "norm": tfidf.norm,
+        "sublinear_tf": tfidf.sublinear_tf,
+        "classes": [int(c) for c in clf.classes_],
+        "class_log_prior": clf.class_log_prior_.tolist(),
+        "feature_log_prob": clf.feature_log_prob_.tolist(),
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(model, f, ensure_ascii=False)
+
+def verify_native_scorer(classifier, scorer, processor, texts):
+    """Check that the native scorer agrees with classifier.predict on raw texts.
+
+    Returns the number of texts whose predictions differ.
+    """
+    expected = classifier.predict([processor.process_ngrams(text) for text in texts])
+    actual = scorer.predict_batch(list(texts))
+    return sum(1 for e, a in zip(expected, actual) if e != a)
+
 def main():
     # Set up paths
     data_dir = Path("data")
@@ -0,0 +1,63 @@
+from n_gram_classifier import *
+"""
+Export an n-gram Naive Bayes model, score the test set with the native
+scorer, check it matches classifier.predict and compare per-review latency
+"""
+import time
+
+
+def main():
+    # Set up paths
+    data_dir = Path("data")
+    train_file = data_dir / "eng.imdb.train.jsonl"
+    test_file = data_dir / "eng.imdb.test.jsonl"
+    model_file = Path("ngram_nb_model.json")
+
+    # Load data
+    print("Loading datasets...")
+    train_data = load_jsonl(train_file)
+    test_data = load_jsonl(test_file)
+    print(f"Loaded {len(train_data)} training reviews")
+    print(f"Loaded {len(test_data)} test reviews")
+
+    # Train an n-gram feature model on a pruned vocabulary
+    processor = NgramDocumentProcessor(n_size=6)
+    train_ngrams, train_labels = process_dataset(processor, train_data, "training", as_ngrams=True)
+    selector = fit_feature_selector(train_ngrams, train_labels)
+    vocabulary = select_features(selector, k_per_label=50000, score="chi2")
+    classifier = create_classifier(vocabulary=vocabulary)
+    classifier.fit(train_ngrams, train_labels)
+
+    # Export and load the native scorer
+    export_scoring_model(classifier, model_file, processor.n_size)
+    import cpp_ngram
+    scorer = cpp_ngram.NaiveBayesScorer(str(model_file))
+    print(f"Loaded native scorer with {scorer.num_features} features")
+
+    texts = [review["text"] for review in test_data]
+    mismatches = verify_native_scorer(classifier, scorer, processor, texts)
+    print(f"Predictions differing from classifier.predict: {mismatches} of {len(texts)}")
+
+    # Per-review latency, one review at a time
+    sample = texts[:1000]
+    start = time.perf_counter()
+    for text in sample:
+        classifier.predict([processor.process_ngrams(text)])
+    python_us = (time.perf_counter() - start) / len(sample) * 1e6
+
+    start = time.perf_counter()
+    for text in sample:
+        scorer.predict(text)
+    native_us = (time.perf_counter() - start) / len(sample) * 1e6
+
+    start = time.perf_counter()
+    scorer.predict_batch(texts)
+    batch_us = (time.perf_counter() - start) / len(texts) * 1e6
+
+    print("\nPer-review latency:")
+    print(f"  sklearn pipeline:       {python_us:10.1f} us")
+    print(f"  native predict:         {native_us:10.1f} us")
+    print(f"  native predict_batch:   {batch_us:10.1f} us")
+
+if __name__ == "__main__":
+    main()
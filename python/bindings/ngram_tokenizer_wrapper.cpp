@@ -1,21 +1,339 @@
 // python/bindings/ngram_tokenizer_wrapper.cpp
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
+#include <pybind11/numpy.h>
 #include "cpp_n_gram_tokenizer/core/ngram_tokenizer.hpp"
+#include "cpp_n_gram_tokenizer/core/feature_selector.hpp"
+#include "cpp_n_gram_tokenizer/core/naive_bayes_scorer.hpp"
 #include <nlohmann/json.hpp>
+#include <cstring>
+#include <string_view>
+#include <vector>
 
 namespace py = pybind11;
 using json = nlohmann::json;
 
+namespace {
+
+// Bounded cache mapping n-gram bytes to one shared Python str object.
+// Once full, new n-grams are returned as fresh strings and not cached, so the
+// n-grams seen first (usually the most common ones) stay shared. Keys view the
+// UTF-8 buffer of the cached str itself, so a hit copies nothing.
+class NgramInterner {
+public:
+    explicit NgramInterner(size_t capacity) : max_size(capacity) {}
+
+    py::list to_list(const std::vector<std::string>& ngrams) {
+        py::list result(ngrams.size());
+        size_t i = 0;
+        for (const auto& ngram : ngrams) {
+            PyList_SET_ITEM(result.ptr(), i++, intern(ngram));
+        }
+        return result;
+    }
+
+    // Returns a new reference
+    PyObject* intern(std::string_view ngram) {
+        size_t hash = std::hash<std::string_view>{}(ngram);
+        size_t slot = find_slot(ngram, hash);
+        if (slots[slot].value != nullptr) {
+            ++hits;
+            Py_INCREF(slots[slot].value);
+            return slots[slot].value;
+        }
+        ++misses;
+        PyObject* value = PyUnicode_DecodeUTF8(ngram.data(), static_cast<Py_ssize_t>(ngram.size()), "replace");
+        if (value == nullptr) {
+            throw py::error_already_set();
+        }
+        if (count < max_size) {
+            Py_ssize_t size = 0;
+            const char* utf8 = PyUnicode_AsUTF8AndSize(value, &size);
+            if (utf8 == nullptr) {
+                PyErr_Clear();
+                return value;
+            }
+            Py_INCREF(value);
+            slots[slot] = {hash, utf8, static_cast<size_t>(size), value};
+            if (++count * 2 > slots.size()) {
+                grow();
+            }
+        }
+        return value;
+    }
+
+    void set_capacity(size_t capacity) {
+        max_size = capacity;
+        if (count > max_size) {
+            clear();
+        }
+    }
+
+    void clear() {
+        for (auto& entry : slots) {
+            Py_XDECREF(entry.value);
+        }
+        slots.assign(initial_slots, Slot{});
+        count = 0;
+        hits = 0;
+        misses = 0;
+    }
+
+    py::dict info() const {
+        py::dict d;
+        d["size"] = count;
+        d["capacity"] = max_size;
+        d["hits"] = hits;
+        d["misses"] = misses;
+        return d;
+    }
+
+private:
+    // Open addressing keeps the hash and the str's UTF-8 buffer next to each
+    // other, so a hit costs one probe plus the object it returns
+    struct Slot {
+        size_t hash = 0;
+        const char* data = nullptr;
+        size_t size = 0;
+        PyObject* value = nullptr;
+    };
+    static constexpr size_t initial_slots = 1024;
+
+    size_t find_slot(std::string_view ngram, size_t hash) const {
+        size_t mask = slots.size() - 1;
+        size_t i = hash & mask;
+        while (slots[i].value != nullptr) {
+            const Slot& s = slots[i];
+            if (s.hash == hash && s.size == ngram.size() &&
+                std::memcmp(s.data, ngram.data(), ngram.size()) == 0) {
+                break;
+            }
+            i = (i + 1) & mask;
+        }
+        return i;
+    }
+
+    void grow() {
+        std::vector<Slot> old(slots.size() * 2);
+        old.swap(slots);
+        for (const auto& entry : old) {
+            if (entry.value != nullptr) {
+                slots[find_slot(std::string_view(entry.data, entry.size), entry.hash)] = entry;
+            }
+        }
+    }
+
+    size_t max_size;
+    size_t count = 0;
+    size_t hits = 0;
+    size_t misses = 0;
+    std::vector<Slot> slots = std::vector<Slot>(initial_slots);
+};
+
+// Shared by every tokenizer; intentionally leaked so no Python objects are
+// released after interpreter shutdown
+NgramInterner* shared_interner = new NgramInterner(1 << 20);
+
+// Pack lists of n-gram strings into one byte buffer plus lengths, so the
+// corpus is not copied into millions of std::string objects
+struct FlatCorpus {
+    std::string text;
+    std::vector<uint32_t> ngram_lengths;
+    std::vector<size_t> doc_ends;
+
+    explicit FlatCorpus(const std::vector<py::object>& docs) {
+        // Size the buffers up front; character counts equal byte counts for ASCII
+        size_t n_ngrams = 0;
+        size_t n_chars = 0;
+        for (py::handle doc : docs) {
+            for (py::handle ngram : doc) {
+                if (!PyUnicode_Check(ngram.ptr())) {
+                    throw py::type_error("n-grams must be str");
+                }
+                n_chars += static_cast<size_t>(PyUnicode_GET_LENGTH(ngram.ptr()));
+                ++n_ngrams;
+            }
+        }
+        text.reserve(n_chars);
+        ngram_lengths.reserve(n_ngrams);
+        doc_ends.reserve(docs.size());
+
+        for (py::handle doc : docs) {
+            for (py::handle ngram : doc) {
+                append(ngram);
+            }
+            doc_ends.push_back(ngram_lengths.size());
+        }
+    }
+
+    // ngram has already been checked to be a str
+    void append(py::handle ngram) {
+        if (PyUnicode_IS_ASCII(ngram.ptr())) {
+            append_bytes(static_cast<const char*>(PyUnicode_DATA(ngram.ptr())),
+                         static_cast<size_t>(PyUnicode_GET_LENGTH(ngram.ptr())));
+            return;
+        }
+        // Encode into a temporary so no UTF-8 copy stays cached on the str
+        py::bytes utf8 = py::reinterpret_steal<py::bytes>(PyUnicode_AsUTF8String(ngram.ptr()));
+        if (!utf8) {
+            throw py::error_already_set();
+        }
+        append_bytes(PyBytes_AS_STRING(utf8.ptr()), static_cast<size_t>(PyBytes_GET_SIZE(utf8.ptr())));
+    }
+
+    void append_bytes(const char* data, size_t size) {
+        text.append(data, size);
+        ngram_lengths.push_back(static_cast<uint32_t>(size));
+    }
+};
+
+// Hand a vector to NumPy without copying; the array owns the buffer
+template <typename T>
+py::array_t<T> as_numpy(std::vector<T>&& values) {
+    auto* owned = new std::vector<T>(std::move(values));
+    py::capsule free_when_done(owned, [](void* p) { delete static_cast<std::vector<T>*>(p); });
+    return py::array_t<T>(owned->size(), owned->data(), free_when_done);
+}
+
+} // namespace
+
 PYBIND11_MODULE(cpp_ngram, m) {
     m.doc() = "Python bindings for C++ N-gram tokenizer"; // Module docstring
 
     py::class_<cpp_n_gram_tokenizer::NgramTokenizer>(m, "NgramTokenizer")
         .def(py::init<size_t>(), py::arg("n_size"))
-        .def("tokenize_text", &cpp_n_gram_tokenizer::NgramTokenizer::tokenize_text,
-             "Tokenize text from a JSON line",
+        .def("tokenize_text",
+             [](cpp_n_gram_tokenizer::NgramTokenizer& self, const std::string& json_line, bool intern) -> py::object {
+                 auto ngrams = self.tokenize_text(json_line);
+                 if (intern) {
+                     return shared_interner->to_list(ngrams);
+                 }
+                 return py::cast(std::move(ngrams));
+             },
+             "Tokenize text from a JSON line; intern=True shares str objects for repeated n-grams",
+             py::arg("json_line"), py::arg("intern") = false)
+        .def("process_file",
+             [](cpp_n_gram_tokenizer::NgramTokenizer& self, const std::string& filename, bool intern) -> py::object {
+                 auto results = self.process_file(filename);
+                 if (!intern) {
+                     return py::cast(std::move(results));
+                 }
+                 py::list out(results.size());
+                 for (size_t i = 0; i < results.size(); ++i) {
+                     auto& [id, ngrams, label] = results[i];
+                     out[i] = py::make_tuple(id, shared_interner->to_list(ngrams), label);
+                     std::vector<std::string>().swap(ngrams);
+                 }
+                 return out;
+             },
+             "Process an entire JSONL file; intern=True shares str objects for repeated n-grams",
+             py::arg("filename"), py::arg("intern") = false)
+        .def("fit_alphabet", &cpp_n_gram_tokenizer::NgramTokenizer::fit_alphabet,
+             "Learn the character table from raw texts, keeping the max_size most frequent (0 keeps all)",
+             py::arg("texts"), py::arg("max_size") = 0)
+        .def("set_alphabet", &cpp_n_gram_tokenizer::NgramTokenizer::set_alphabet,
+             "Use a precomputed character table; IDs follow its order",
+             py::arg("chars"))
+        .def_property_readonly("alphabet", &cpp_n_gram_tokenizer::NgramTokenizer::alphabet)
+        .def_property_readonly("id_space_size", &cpp_n_gram_tokenizer::NgramTokenizer::id_space_size,
+                               "Number of possible n-gram IDs, e.g. the minlength for numpy.bincount")
+        .def("encode_text",
+             [](const cpp_n_gram_tokenizer::NgramTokenizer& self, const std::string& json_line) {
+                 // Snapshot the alphabet while holding the GIL so set_alphabet can't free it
+                 auto table = self.alphabet_table();
+                 std::vector<int64_t> ids;
+                 {
+                     py::gil_scoped_release release;
+                     ids = self.encode_text(json_line, *table);
+                 }
+                 return as_numpy(std::move(ids));
+             },
+             "Dense int64 n-gram IDs for the text of a JSON line",
              py::arg("json_line"))
-        .def("process_file", &cpp_n_gram_tokenizer::NgramTokenizer::process_file,
-             "Process an entire JSONL file",
-             py::arg("filename"));
-}
\ No newline at end of file
+        .def("encode_ngrams",
+             [](const cpp_n_gram_tokenizer::NgramTokenizer& self, const std::string& text) {
+                 // Snapshot the alphabet while holding the GIL so set_alphabet can't free it
+                 auto table = self.alphabet_table();
+                 std::vector<int64_t> ids;
+                 {
+                     py::gil_scoped_release release;
+                     ids = self.encode_ngrams(text, *table);
+                 }
+                 return as_numpy(std::move(ids));
+             },
+             "Dense int64 n-gram IDs for raw text",
+             py::arg("text"))
+        .def("decode_id", &cpp_n_gram_tokenizer::NgramTokenizer::decode_id,
+             "Decode an n-gram ID back to text (out-of-alphabet characters become U+FFFD)",
+             py::arg("id"));
+
+    m.def("set_intern_capacity", [](size_t capacity) { shared_interner->set_capacity(capacity); },
+          "Set the maximum number of n-grams kept in the shared intern cache",
+          py::arg("capacity"));
+    m.def("clear_intern_cache", []() { shared_interner->clear(); },
+          "Drop every cached n-gram string and reset the hit counters");
+    m.def("intern_cache_info", []() { return shared_interner->info(); },
+          "Size, capacity, hits and misses of the shared intern cache");
+
+    py::enum_<cpp_n_gram_tokenizer::FeatureScore>(m, "FeatureScore")
+        .value("CHI2", cpp_n_gram_tokenizer::FeatureScore::ChiSquare)
+        .value("LOG_COUNT_RATIO", cpp_n_gram_tokenizer::FeatureScore::LogCountRatio)
+        .value("MUTUAL_INFO", cpp_n_gram_tokenizer::FeatureScore::MutualInformation);
+
+    py::class_<cpp_n_gram_tokenizer::FeatureSelector>(m, "FeatureSelector")
+        .def(py::init<size_t, double>(), py::arg("num_threads") = 0, py::arg("alpha") = 1.0)
+        .def("fit",
+             [](cpp_n_gram_tokenizer::FeatureSelector& self, py::iterable docs, std::vector<int> labels) {
+                 std::vector<py::object> doc_lists;
+                 for (py::handle doc : docs) {
+                     doc_lists.push_back(py::reinterpret_borrow<py::object>(doc));
+                 }
+                 FlatCorpus corpus(doc_lists);
+                 py::gil_scoped_release release;
+                 self.fit_flat(corpus.text, corpus.ngram_lengths, corpus.doc_ends, labels);
+             },
+             "Count per-label n-gram statistics over tokenized documents",
+             py::arg("docs"), py::arg("labels"))
+        .def("fit_results",
+             [](cpp_n_gram_tokenizer::FeatureSelector& self, py::iterable results) {
+                 std::vector<py::object> doc_lists;
+                 std::vector<int> labels;
+                 for (py::handle result : results) {
+                     auto row = py::reinterpret_borrow<py::sequence>(result);
+                     doc_lists.push_back(row[1]);
+                     labels.push_back(row[2].cast<int>());
+                 }
+                 FlatCorpus corpus(doc_lists);
+                 py::gil_scoped_release release;
+                 self.fit_flat(corpus.text, corpus.ngram_lengths, corpus.doc_ends, labels);
+             },
+             "Count per-label n-gram statistics over process_file output",
+             py::arg("results"))
+        .def("top_features", &cpp_n_gram_tokenizer::FeatureSelector::top_features,
+             "Top k (n-gram, score) pairs favouring a label",
+             py::arg("label"), py::arg("k"), py::arg("score") = cpp_n_gram_tokenizer::FeatureScore::ChiSquare)
+        .def("select", &cpp_n_gram_tokenizer::FeatureSelector::select,
+             "Sorted union of the top k n-grams for every label",
+             py::arg("k_per_label"), py::arg("score") = cpp_n_gram_tokenizer::FeatureScore::ChiSquare)
+        .def_property_readonly("labels", &cpp_n_gram_tokenizer::FeatureSelector::labels)
+        .def_property_readonly("vocabulary_size", &cpp_n_gram_tokenizer::FeatureSelector::vocabulary_size)
+        .def_property_readonly("num_documents", &cpp_n_gram_tokenizer::FeatureSelector::num_documents);
+
+    py::class_<cpp_n_gram_tokenizer::NaiveBayesScorer>(m, "NaiveBayesScorer")
+        .def(py::init<const std::string&>(), py::arg("model_path"))
+        .def("predict", &cpp_n_gram_tokenizer::NaiveBayesScorer::predict,
+             "Predict the class of one raw text",
+             py::arg("text"),
+             py::call_guard<py::gil_scoped_release>())
+        .def("joint_log_likelihood", &cpp_n_gram_tokenizer::NaiveBayesScorer::joint_log_likelihood,
+             "Per-class joint log-likelihood of one raw text",
+             py::arg("text"),
+             py::call_guard<py::gil_scoped_release>())
+        .def("predict_batch", &cpp_n_gram_tokenizer::NaiveBayesScorer::predict_batch,
+             "Predict the class of every raw text on worker threads",
+             py::arg("texts"), py::arg("num_threads") = 0,
+             py::call_guard<py::gil_scoped_release>())
+        .def_property_readonly("classes", &cpp_n_gram_tokenizer::NaiveBayesScorer::classes)
+        .def_property_readonly("num_features", &cpp_n_gram_tokenizer::NaiveBayesScorer::num_features)
+        .def_property_readonly("n_size", &cpp_n_gram_tokenizer::NaiveBayesScorer::ngram_size);
+}
@@ -0,0 +1,83 @@
+# python/scripts/bench_interning.py
+"""
+Measure peak RSS and throughput of holding every review's n-gram list in
+Python, with and without the shared intern cache in cpp_ngram.
+
+Each (dataset, mode) pair runs in its own subprocess so peak RSS is not
+shared between runs.
+
+Usage: python3 python/scripts/bench_interning.py [data_dir] [n_size]
+"""
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+DATASETS = ["eng.imdb.train.jsonl", "eng.imdb.test.jsonl",
+            "spa.muchocine.train.jsonl", "spa.muchocine.test.jsonl"]
+
+def find_module():
+    # Get the project root directory (where CMakeLists.txt is)
+    project_root = Path(__file__).parent.parent.parent
+    so_files = list((project_root / "build").rglob("*.so"))
+    if not so_files:
+        raise FileNotFoundError("Could not find cpp_ngram module. Did you build the project?")
+    sys.path.append(str(so_files[0].parent))
+
+def peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run_single(path, n_size, intern):
+    """Tokenize every review in path, keeping all n-gram lists alive."""
+    find_module()
+    import cpp_ngram
+
+    lines = Path(path).read_text(encoding="utf-8").splitlines()
+    tokenizer = cpp_ngram.NgramTokenizer(n_size)
+    baseline = peak_rss_mb()
+
+    start = time.perf_counter()
+    all_ngrams = [tokenizer.tokenize_text(line, intern=intern) for line in lines]
+    elapsed = time.perf_counter() - start
+    # Read RSS before counting objects, whose id set would otherwise inflate it
+    peak_delta = peak_rss_mb() - baseline
+
+    total = sum(len(ngrams) for ngrams in all_ngrams)
+    unique_objects = len({id(ngram) for ngrams in all_ngrams for ngram in ngrams})
+    print(json.dumps({
+        "reviews": len(lines),
+        "ngrams": total,
+        "str_objects": unique_objects,
+        "seconds": elapsed,
+        "ngrams_per_sec": total / elapsed if elapsed else 0.0,
+        "peak_rss_delta_mb": peak_delta,
+        "cache": cpp_ngram.intern_cache_info() if intern else None,
+    }))
+
+def main():
+    data_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("data")
+    n_size = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    print(f"{'dataset':28}{'intern':>8}{'n-grams':>12}{'str objs':>12}"
+          f"{'M ngram/s':>11}{'peak MB':>10}")
+    for name in DATASETS:
+        path = data_dir / name
+        if not path.exists():
+            print(f"{name:28}  missing, skipped")
+            continue
+        for intern in (False, True):
+            out = subprocess.run(
+                [sys.executable, __file__, "--single", str(path), str(n_size), str(int(intern))],
+                capture_output=True, text=True, check=True)
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"{name:28}{str(intern):>8}{r['ngrams']:>12}{r['str_objects']:>12}"
+                  f"{r['ngrams_per_sec'] / 1e6:>11.2f}{r['peak_rss_delta_mb']:>10.1f}")
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == "--single":
+        run_single(sys.argv[2], int(sys.argv[3]), bool(int(sys.argv[4])))
+    else:
+        main()
@@ -0,0 +1,416 @@
+// src/core/feature_selector.cpp
+
+#include "cpp_n_gram_tokenizer/core/feature_selector.hpp"
+#include <algorithm>
+#include <cmath>
+#include <limits>
+#include <stdexcept>
+#include <thread>
+
+namespace cpp_n_gram_tokenizer {
+
+FeatureSelector::FeatureSelector(size_t num_threads, double alpha)
+    : n_threads(num_threads), smoothing(alpha) {
+    if (n_threads == 0) {
+        n_threads = std::max<size_t>(1, std::thread::hardware_concurrency());
+    }
+    if (alpha <= 0.0) {
+        throw std::invalid_argument("Smoothing alpha must be positive");
+    }
+}
+
+namespace {
+
+// Documents are read in blocks so the routing buffers stay small
+constexpr size_t kBlockDocs = 512;
+
+// One n-gram occurrence, routed with its hash from the worker that read it
+// to the shard that counts it
+struct Occurrence {
+    const char* data;
+    uint32_t size;
+    uint32_t doc;
+    size_t hash;
+};
+
+// One hash shard of the vocabulary: an open-addressing table of feature ids
+// keyed by the routed hash, the n-gram bytes, and flat per-label counts
+struct Shard {
+    size_t n_labels = 0;
+    size_t n_shards = 1;
+    std::vector<uint32_t> slots;   // feature id + 1, 0 marks an empty slot
+    std::vector<size_t> hashes;
+    std::string text;
+    std::vector<size_t> ends;
+    std::vector<uint32_t> docs;
+    std::vector<uint64_t> terms;
+    std::vector<uint32_t> last_doc;
+    std::vector<uint64_t> label_terms;
+
+    std::string_view name(size_t id) const {
+        size_t begin = (id == 0) ? 0 : ends[id - 1];
+        return std::string_view(text).substr(begin, ends[id] - begin);
+    }
+
+    // Every hash in this shard has the same remainder, so probe on the quotient
+    size_t home(size_t hash) const { return (hash / n_shards) & (slots.size() - 1); }
+
+    void grow() {
+        std::vector<uint32_t> larger(slots.empty() ? 1024 : slots.size() * 2, 0);
+        slots.swap(larger);
+        for (size_t id = 0; id < hashes.size(); ++id) {
+            size_t i = home(hashes[id]);
+            while (slots[i] != 0) {
+                i = (i + 1) & (slots.size() - 1);
+            }
+            slots[i] = static_cast<uint32_t>(id + 1);
+        }
+    }
+
+    void count(const Occurrence& occ, size_t li) {
+        if ((hashes.size() + 1) * 2 > slots.size()) {
+            grow();
+        }
+        std::string_view ngram(occ.data, occ.size);
+        label_terms[li] += 1;
+        size_t i = home(occ.hash);
+        while (slots[i] != 0) {
+            size_t id = slots[i] - 1;
+            if (hashes[id] == occ.hash && name(id) == ngram) {
+                if (last_doc[id] != occ.doc) {
+                    docs[id * n_labels + li] += 1;
+                    last_doc[id] = occ.doc;
+                }
+                terms[id * n_labels + li] += 1;
+                return;
+            }
+            i = (i + 1) & (slots.size() - 1);
+        }
+
+        size_t id = hashes.size();
+        slots[i] = static_cast<uint32_t>(id + 1);
+        hashes.push_back(occ.hash);
+        text.append(ngram);
+        ends.push_back(text.size());
+        docs.resize(docs.size() + n_labels, 0);
+        terms.resize(terms.size() + n_labels, 0);
+        last_doc.push_back(occ.doc);
+        docs[id * n_labels + li] = 1;
+        terms[id * n_labels + li] = 1;
+    }
+};
+
+// Runs fn(0) .. fn(workers - 1), on threads when there is more than one
+template <typename Fn>
+void run_workers(size_t workers, Fn fn) {
+    if (workers == 1) {
+        fn(0);
+        return;
+    }
+    std::vector<std::thread> threads;
+    for (size_t w = 0; w < workers; ++w) {
+        threads.emplace_back(fn, w);
+    }
+    for (auto& t : threads) {
+        t.join();
+    }
+}
+
+} // namespace
+
+template <typename ForEachNgram>
+void FeatureSelector::fit_impl(const std::vector<int>& labels, ForEachNgram for_each_ngram) {
+    const size_t n_docs = labels.size();
+    if (n_docs >= std::numeric_limits<uint32_t>::max()) {
+        throw std::invalid_argument("Too many documents for feature selection");
+    }
+
+    // Map raw labels to dense indices. Everything is built in locals and only
+    // swapped into the members at the end, so a failed fit leaves the
+    // selector as it was
+    std::vector<int> values = labels;
+    std::sort(values.begin(), values.end());
+    values.erase(std::unique(values.begin(), values.end()), values.end());
+    if (values.size() < 2) {
+        throw std::invalid_argument("Feature selection needs at least two distinct labels");
+    }
+    const size_t n_labels = values.size();
+    std::vector<uint32_t> doc_labels(n_docs);
+    for (size_t d = 0; d < n_docs; ++d) {
+        auto it = std::lower_bound(values.begin(), values.end(), labels[d]);
+        doc_labels[d] = static_cast<uint32_t>(it - values.begin());
+    }
+
+    // The vocabulary is sharded by hash, so no n-gram is held by more than one
+    // worker. Each block of documents is split across the workers, which hash
+    // every n-gram once and route it to its shard; the shard owners then count
+    // what they were sent, reusing the hash for their table lookups
+    const size_t workers = n_threads;
+    std::vector<Shard> shards(workers);
+    for (auto& shard : shards) {
+        shard.n_labels = n_labels;
+        shard.n_shards = workers;
+        shard.label_terms.assign(n_labels, 0);
+    }
+    // outbox[w * workers + s] holds what worker w read for shard s
+    std::vector<std::vector<Occurrence>> outbox(workers * workers);
+    std::hash<std::string_view> hasher;
+
+    for (size_t block = 0; block < n_docs; block += kBlockDocs) {
+        const size_t block_end = std::min(n_docs, block + kBlockDocs);
+        const size_t per_worker = (block_end - block + workers - 1) / workers;
+
+        run_workers(workers, [&](size_t w) {
+            for (size_t s = 0; s < workers; ++s) {
+                outbox[w * workers + s].clear();
+            }
+            size_t begin = std::min(block_end, block + w * per_worker);
+            size_t end = std::min(block_end, begin + per_worker);
+            for (size_t d = begin; d < end; ++d) {
+                for_each_ngram(d, [&](std::string_view ngram) {
+                    size_t hash = hasher(ngram);
+                    outbox[w * workers + hash % workers].push_back(
+                        {ngram.data(), static_cast<uint32_t>(ngram.size()), static_cast<uint32_t>(d), hash});
+                });
+            }
+        });
+
+        // Workers read contiguous document ranges, so each shard sees the
+        // n-grams of one document together and in document order
+        run_workers(workers, [&](size_t s) {
+            Shard& shard = shards[s];
+            for (size_t w = 0; w < workers; ++w) {
+                for (const auto& occ : outbox[w * workers + s]) {
+                    shard.count(occ, doc_labels[occ.doc]);
+                }
+            }
+        });
+    }
+    outbox.clear();
+
+    // Gather the shards; they are disjoint, so their n-grams and counts are appended
+    size_t n_features = 0;
+    size_t n_bytes = 0;
+    for (const auto& shard : shards) {
+        n_features += shard.ends.size();
+        n_bytes += shard.text.size();
+    }
+    std::string text;
+    text.reserve(n_bytes);
+    std::vector<size_t> ends;
+    ends.reserve(n_features);
+    std::vector<uint32_t> docs;
+    docs.reserve(n_features * n_labels);
+    std::vector<uint64_t> terms;
+    terms.reserve(n_features * n_labels);
+    std::vector<uint64_t> per_label_docs(n_labels, 0);
+    std::vector<uint64_t> per_label_terms(n_labels, 0);
+    for (size_t d = 0; d < n_docs; ++d) {
+        per_label_docs[doc_labels[d]] += 1;
+    }
+    for (auto& shard : shards) {
+        for (size_t li = 0; li < n_labels; ++li) {
+            per_label_terms[li] += shard.label_terms[li];
+        }
+        size_t base = text.size();
+        text.append(shard.text);
+        for (size_t end : shard.ends) {
+            ends.push_back(base + end);
+        }
+        docs.insert(docs.end(), shard.docs.begin(), shard.docs.end());
+        terms.insert(terms.end(), shard.terms.begin(), shard.terms.end());
+        shard = Shard();
+    }
+
+    label_values.swap(values);
+    label_docs.swap(per_label_docs);
+    label_terms.swap(per_label_terms);
+    total_docs = n_docs;
+    feature_text.swap(text);
+    feature_ends.swap(ends);
+    doc_counts.swap(docs);
+    term_counts.swap(terms);
+}
+
+void FeatureSelector::fit(const std::vector<std::vector<std::string>>& docs,
+                          const std::vector<int>& labels) {
+    if (docs.size() != labels.size()) {
+        throw std::invalid_argument("Number of documents and labels must match");
+    }
+    fit_impl(labels, [&](size_t d, auto&& visit) {
+        for (const auto& ngram : docs[d]) {
+            visit(ngram);
+        }
+    });
+}
+
+void FeatureSelector::fit_results(
+    const std::vector<std::tuple<std::string, std::vector<std::string>, int>>& results) {
+    std::vector<int> labels;
+    labels.reserve(results.size());
+    for (const auto& result : results) {
+        labels.push_back(std::get<2>(result));
+    }
+    fit_impl(labels, [&](size_t d, auto&& visit) {
+        for (const auto& ngram : std::get<1>(results[d])) {
+            visit(ngram);
+        }
+    });
+}
+
+void FeatureSelector::fit_flat(const std::string& text, const std::vector<uint32_t>& ngram_lengths,
+                               const std::vector<size_t>& doc_ends, const std::vector<int>& labels) {
+    if (doc_ends.size() != labels.size()) {
+        throw std::invalid_argument("Number of documents and labels must match");
+    }
+
+    // Byte offset where each document starts
+    std::vector<size_t> doc_starts(doc_ends.size() + 1, 0);
+    size_t first = 0;
+    size_t offset = 0;
+    for (size_t d = 0; d < doc_ends.size(); ++d) {
+        if (doc_ends[d] < first || doc_ends[d] > ngram_lengths.size()) {
+            throw std::invalid_argument("Flat corpus offsets do not match its contents");
+        }
+        for (size_t i = first; i < doc_ends[d]; ++i) {
+            offset += ngram_lengths[i];
+        }
+        doc_starts[d + 1] = offset;
+        first = doc_ends[d];
+    }
+    if (offset != text.size()) {
+        throw std::invalid_argument("Flat corpus offsets do not match its contents");
+    }
+
+    fit_impl(labels, [&](size_t d, auto&& visit) {
+        // Views into the text, which is never copied
+        size_t pos = doc_starts[d];
+        for (size_t i = (d == 0) ? 0 : doc_ends[d - 1]; i < doc_ends[d]; ++i) {
+            visit(std::string_view(text.data() + pos, ngram_lengths[i]));
+            pos += ngram_lengths[i];
+        }
+    });
+}
+
+std::string_view FeatureSelector::feature_name(uint32_t feature) const {
+    size_t begin = (feature == 0) ? 0 : feature_ends[feature - 1];
+    return std::string_view(feature_text).substr(begin, feature_ends[feature] - begin);
+}
+
+size_t FeatureSelector::label_index(int label) const {
+    auto it = std::lower_bound(label_values.begin(), label_values.end(), label);
+    if (it == label_values.end() || *it != label) {
+        throw std::invalid_argument("Unknown label: " + std::to_string(label));
+    }
+    return static_cast<size_t>(it - label_values.begin());
+}
+
+uint64_t FeatureSelector::document_frequency(uint32_t feature) const {
+    const size_t n_labels = label_values.size();
+    uint64_t df = 0;
+    for (size_t li = 0; li < n_labels; ++li) {
+        df += doc_counts[feature * n_labels + li];
+    }
+    return df;
+}
+
+bool FeatureSelector::is_associated(uint32_t feature, size_t label_idx) const {
+    // True when the n-gram's document rate is higher inside the label than outside it
+    double in_label = static_cast<double>(doc_counts[feature * label_values.size() + label_idx]);
+    double df = static_cast<double>(document_frequency(feature));
+    double label_n = static_cast<double>(label_docs[label_idx]);
+    double other_n = static_cast<double>(total_docs) - label_n;
+    return in_label * other_n > (df - in_label) * label_n;
+}
+
+double FeatureSelector::score_feature(uint32_t feature, size_t label_idx, FeatureScore score) const {
+    const size_t n_labels = label_values.size();
+    const size_t offset = static_cast<size_t>(feature) * n_labels;
+    double n = static_cast<double>(total_docs);
+
+    // 2x2 contingency table of (contains n-gram) x (has label)
+    double a = static_cast<double>(doc_counts[offset + label_idx]);
+    double b = static_cast<double>(document_frequency(feature)) - a;
+    double c = static_cast<double>(label_docs[label_idx]) - a;
+    double d = n - a - b - c;
+
+    switch (score) {
+        case FeatureScore::ChiSquare: {
+            double denom = (a + b) * (c + d) * (a + c) * (b + d);
+            if (denom == 0.0) return 0.0;
+            double diff = a * d - b * c;
+            return n * diff * diff / denom;
+        }
+        case FeatureScore::MutualInformation: {
+            auto term = [n](double joint, double row, double col) {
+                if (joint == 0.0) return 0.0;
+                return (joint / n) * std::log(n * joint / (row * col));
+            };
+            return term(a, a + b, a + c) + term(b, a + b, b + d) +
+                   term(c, c + d, a + c) + term(d, c + d, b + d);
+        }
+        case FeatureScore::LogCountRatio: {
+            // NBSVM-style ratio of smoothed, normalized occurrence counts
+            double vocab = static_cast<double>(feature_ends.size());
+            double in_terms = static_cast<double>(label_terms[label_idx]);
+            double all_terms = 0.0;
+            for (auto t : label_terms) all_terms += t;
+            double p = smoothing + static_cast<double>(term_counts[offset + label_idx]);
+            double q = smoothing;
+            for (size_t li = 0; li < n_labels; ++li) {
+                if (li != label_idx) q += static_cast<double>(term_counts[offset + li]);
+            }
+            double p_norm = smoothing * vocab + in_terms;
+            double q_norm = smoothing * vocab + (all_terms - in_terms);
+            return std::log((p / p_norm) / (q / q_norm));
+        }
+    }
+    return 0.0;
+}
+
+std::vector<std::pair<std::string, double>>
+FeatureSelector::top_features(int label, size_t k, FeatureScore score) const {
+    if (feature_ends.empty()) {
+        throw std::runtime_error("FeatureSelector has not been fitted");
+    }
+    size_t li = label_index(label);
+
+    // Rank feature ids; strings are built only for the top k
+    std::vector<std::pair<uint32_t, double>> scored;
+    scored.reserve(feature_ends.size());
+    for (uint32_t feature = 0; feature < feature_ends.size(); ++feature) {
+        // Chi-square and MI are symmetric, so keep only n-grams that favour this label
+        if (score != FeatureScore::LogCountRatio && !is_associated(feature, li)) {
+            continue;
+        }
+        scored.emplace_back(feature, score_feature(feature, li, score));
+    }
+
+    auto by_score = [this](const auto& lhs, const auto& rhs) {
+        if (lhs.second != rhs.second) return lhs.second > rhs.second;
+        return feature_name(lhs.first) < feature_name(rhs.first);
+    };
+    k = std::min(k, scored.size());
+    std::partial_sort(scored.begin(), scored.begin() + k, scored.end(), by_score);
+
+    std::vector<std::pair<std::string, double>> top;
+    top.reserve(k);
+    for (size_t i = 0; i < k; ++i) {
+        top.emplace_back(std::string(feature_name(scored[i].first)), scored[i].second);
+    }
+    return top;
+}
+
+std::vector<std::string> FeatureSelector::select(size_t k_per_label, FeatureScore score) const {
+    std::vector<std::string> vocabulary;
+    for (int label : label_values) {
+        for (auto& [ngram, value] : top_features(label, k_per_label, score)) {
+            vocabulary.push_back(std::move(ngram));
+        }
+    }
+    std::sort(vocabulary.begin(), vocabulary.end());
+    vocabulary.erase(std::unique(vocabulary.begin(), vocabulary.end()), vocabulary.end());
+    return vocabulary;
+}
+
+} // namespace cpp_n_gram_tokenizer
@@ -0,0 +1,162 @@
+// src/core/naive_bayes_scorer.cpp
+
+#include "cpp_n_gram_tokenizer/core/naive_bayes_scorer.hpp"
+#include <algorithm>
+#include <cmath>
+#include <fstream>
+#include <stdexcept>
+#include <thread>
+
+using json = nlohmann::json;
+
+namespace cpp_n_gram_tokenizer {
+
+namespace {
+
+json read_model(const std::string& model_path) {
+    std::ifstream file(model_path);
+    if (!file.is_open()) {
+        throw std::runtime_error("Could not open model: " + model_path);
+    }
+    return json::parse(file);
+}
+
+} // namespace
+
+NaiveBayesScorer::NaiveBayesScorer(const std::string& model_path)
+    : NaiveBayesScorer(read_model(model_path)) {}
+
+NaiveBayesScorer::NaiveBayesScorer(const json& model)
+    : tokenizer(model.at("n_size").get<size_t>()),
+      feature_names(model.at("vocabulary").get<std::vector<std::string>>()),
+      class_log_prior(model.at("class_log_prior").get<std::vector<double>>()),
+      class_labels(model.at("classes").get<std::vector<int>>()),
+      norm(model.at("norm").is_null() ? "none" : model.at("norm").get<std::string>()),
+      sublinear_tf(model.value("sublinear_tf", false)) {
+    const size_t n_features = feature_names.size();
+    const size_t n_classes = class_labels.size();
+
+    if (!model.at("idf").is_null()) {
+        idf = model.at("idf").get<std::vector<double>>();
+        if (idf.size() != n_features) {
+            throw std::invalid_argument("IDF weights do not match the vocabulary size");
+        }
+    }
+    if (class_log_prior.size() != n_classes) {
+        throw std::invalid_argument("Class log priors do not match the number of classes");
+    }
+    if (norm != "l1" && norm != "l2" && norm != "none") {
+        throw std::invalid_argument("Unsupported norm: " + norm);
+    }
+
+    // Store log-probabilities feature-major so one lookup touches every class
+    const auto& rows = model.at("feature_log_prob");
+    if (rows.size() != n_classes) {
+        throw std::invalid_argument("Feature log-probabilities do not match the number of classes");
+    }
+    feature_log_prob.resize(n_features * n_classes);
+    for (size_t k = 0; k < n_classes; ++k) {
+        if (rows[k].size() != n_features) {
+            throw std::invalid_argument("Feature log-probabilities do not match the vocabulary size");
+        }
+        for (size_t j = 0; j < n_features; ++j) {
+            feature_log_prob[j * n_classes + k] = rows[k][j].get<double>();
+        }
+    }
+
+    vocabulary.reserve(n_features);
+    for (size_t j = 0; j < n_features; ++j) {
+        vocabulary.emplace(feature_names[j], static_cast<uint32_t>(j));
+    }
+}
+
+std::vector<std::pair<uint32_t, double>> NaiveBayesScorer::tfidf_row(const std::string& text) const {
+    // Look up n-grams as they are extracted; unknown ones are dropped
+    std::vector<uint32_t> hits;
+    tokenizer.for_each_ngram(text, [&](std::string_view ngram) {
+        auto it = vocabulary.find(ngram);
+        if (it != vocabulary.end()) {
+            hits.push_back(it->second);
+        }
+    });
+
+    // Term counts in ascending feature order, like sklearn's sorted CSR rows
+    std::sort(hits.begin(), hits.end());
+    std::vector<std::pair<uint32_t, double>> row;
+    for (size_t i = 0; i < hits.size(); ) {
+        size_t j = i;
+        while (j < hits.size() && hits[j] == hits[i]) ++j;
+        row.emplace_back(hits[i], static_cast<double>(j - i));
+        i = j;
+    }
+
+    // TfidfTransformer: sublinear tf, idf scaling, then row normalization
+    for (auto& [index, value] : row) {
+        if (sublinear_tf) value = std::log(value) + 1.0;
+        if (!idf.empty()) value *= idf[index];
+    }
+    if (norm != "none") {
+        double total = 0.0;
+        for (const auto& entry : row) {
+            total += (norm == "l2") ? entry.second * entry.second : std::fabs(entry.second);
+        }
+        if (total != 0.0) {
+            if (norm == "l2") total = std::sqrt(total);
+            for (auto& entry : row) entry.second /= total;
+        }
+    }
+    return row;
+}
+
+std::vector<double> NaiveBayesScorer::joint_log_likelihood(const std::string& text) const {
+    const size_t n_classes = class_labels.size();
+    std::vector<double> jll(n_classes, 0.0);
+
+    // Sparse row times feature_log_prob.T, accumulated in feature order
+    for (const auto& [index, value] : tfidf_row(text)) {
+        const double* weights = &feature_log_prob[static_cast<size_t>(index) * n_classes];
+        for (size_t k = 0; k < n_classes; ++k) {
+            jll[k] += value * weights[k];
+        }
+    }
+    for (size_t k = 0; k < n_classes; ++k) {
+        jll[k] += class_log_prior[k];
+    }
+    return jll;
+}
+
+int NaiveBayesScorer::predict(const std::string& text) const {
+    std::vector<double> jll = joint_log_likelihood(text);
+    // First maximum wins, as with numpy.argmax
+    size_t best = 0;
+    for (size_t k = 1; k < jll.size(); ++k) {
+        if (jll[k] > jll[best]) best = k;
+    }
+    return class_labels[best];
+}
+
+std::vector<int> NaiveBayesScorer::predict_batch(const std::vector<std::string>& texts,
+                                                 size_t num_threads) const {
+    std::vector<int> predictions(texts.size());
+    if (num_threads == 0) {
+        num_threads = std::max<size_t>(1, std::thread::hardware_concurrency());
+    }
+    size_t workers = std::min(num_threads, std::max<size_t>(1, texts.size()));
+    size_t chunk = (texts.size() + workers - 1) / workers;
+
+    std::vector<std::thread> threads;
+    for (size_t w = 0; w < workers; ++w) {
+        threads.emplace_back([&, w]() {
+            size_t end = std::min(texts.size(), (w + 1) * chunk);
+            for (size_t i = w * chunk; i < end; ++i) {
+                predictions[i] = predict(texts[i]);
+            }
+        });
+    }
+    for (auto& t : threads) {
+        t.join();
+    }
+    return predictions;
+}
+
+} // namespace cpp_n_gram_tokenizer
@@ -5,6 +5,7 @@
 #include <algorithm>
 #include <stdexcept>
 #include <iostream>
+#include <limits>
 #include <vector>
 
 using json = nlohmann::json;
@@ -31,7 +32,7 @@ NgramTokenizer::NgramTokenizer(size_t n) : n_size(n) {
     }
 }
 
-std::string NgramTokenizer::normalize_text(const std::string& text) {
+std::string NgramTokenizer::normalize_text(const std::string& text) const {
     std::string normalized;
     normalized.reserve(text.length());
     
@@ -79,29 +80,181 @@ std::string NgramTokenizer::normalize_text(const std::string& text) {
     return normalized;
 }
 
-std::vector<std::string> NgramTokenizer::extract_ngrams(const std::string& text) {
-    std::vector<std::string> ngrams;
-    std::string normalized = normalize_text(text);
-    
-    // Count UTF-8 characters
-    std::vector<size_t> char_positions;
+std::vector<size_t> NgramTokenizer::char_positions(const std::string& normalized) const {
+    // Byte offset of every UTF-8 character
+    std::vector<size_t> positions;
     for (size_t i = 0; i < normalized.length(); ) {
-        char_positions.push_back(i);
+        positions.push_back(i);
         i += utf8_char_length(static_cast<unsigned char>(normalized[i]));
     }
+    return positions;
+}
+
+std::vector<std::string> NgramTokenizer::extract_ngrams(const std::string& text) const {
+    std::vector<std::string> ngrams;
+    for_each_ngram(text, [&ngrams](std::string_view ngram) {
+        ngrams.emplace_back(ngram);
+    });
+    return ngrams;
+}
+
+void NgramTokenizer::fit_alphabet(const std::vector<std::string>& texts, size_t max_size) {
+    // Count every normalized character
+    std::unordered_map<std::string, size_t> counts;
+    for (const auto& text : texts) {
+        std::string normalized = normalize_text(text);
+        std::vector<size_t> positions = char_positions(normalized);
+        for (size_t i = 0; i < positions.size(); ++i) {
+            size_t end = (i + 1 < positions.size()) ? positions[i + 1] : normalized.length();
+            counts[normalized.substr(positions[i], end - positions[i])] += 1;
+        }
+    }
     
-    // Extract n-grams based on character positions
-    if (char_positions.size() >= n_size) {
-        for (size_t i = 0; i <= char_positions.size() - n_size; ++i) {
-            size_t start = char_positions[i];
-            size_t end = (i + n_size < char_positions.size()) ? 
-                        char_positions[i + n_size] : 
-                        normalized.length();
-            ngrams.push_back(normalized.substr(start, end - start));
+    // Keep the most frequent characters, ties broken by byte order
+    std::vector<std::pair<std::string, size_t>> ranked(counts.begin(), counts.end());
+    std::sort(ranked.begin(), ranked.end(), [](const auto& lhs, const auto& rhs) {
+        if (lhs.second != rhs.second) return lhs.second > rhs.second;
+        return lhs.first < rhs.first;
+    });
+    if (max_size > 0 && ranked.size() > max_size) {
+        ranked.resize(max_size);
+    }
+    
+    std::vector<std::string> chars;
+    chars.reserve(ranked.size());
+    for (auto& [ch, count] : ranked) {
+        chars.push_back(std::move(ch));
+    }
+    set_alphabet(chars);
+}
+
+void NgramTokenizer::set_alphabet(const std::vector<std::string>& chars) {
+    auto table = std::make_shared<Alphabet>();
+    // Reserved up front: char_to_index keys view these strings, so they must not move
+    table->index_to_char.reserve(chars.size() + 1);
+    table->index_to_char.push_back("\xEF\xBF\xBD"); // U+FFFD for index 0
+    for (const auto& ch : chars) {
+        if (ch.empty() || utf8_char_length(static_cast<unsigned char>(ch[0])) != ch.size()) {
+            throw std::invalid_argument("Alphabet entries must be single UTF-8 characters");
+        }
+        auto index = static_cast<uint32_t>(table->index_to_char.size());
+        if (ch.size() == 1) {
+            uint32_t& slot = table->byte_index[static_cast<unsigned char>(ch[0])];
+            if (slot == 0) {
+                slot = index;
+                table->index_to_char.push_back(ch);
+            }
+        } else if (table->char_to_index.find(ch) == table->char_to_index.end()) {
+            table->index_to_char.push_back(ch);
+            table->char_to_index.emplace(table->index_to_char.back(), index);
         }
     }
     
-    return ngrams;
+    // IDs are base-(alphabet size + 1) numbers with n digits, which must fit in int64
+    int64_t base = static_cast<int64_t>(table->index_to_char.size());
+    int64_t space = 1;
+    for (size_t i = 0; i < n_size; ++i) {
+        if (space > std::numeric_limits<int64_t>::max() / base) {
+            throw std::invalid_argument("Alphabet of " + std::to_string(chars.size()) +
+                                        " characters is too large for dense " +
+                                        std::to_string(n_size) + "-gram IDs");
+        }
+        space *= base;
+    }
+    
+    table->id_space = space;
+    char_table = std::move(table);
+}
+
+std::vector<std::string> NgramTokenizer::alphabet() const {
+    if (!char_table) {
+        return {};
+    }
+    const auto& chars = char_table->index_to_char;
+    return std::vector<std::string>(chars.begin() + 1, chars.end());
+}
+
+std::shared_ptr<const NgramTokenizer::Alphabet> NgramTokenizer::alphabet_table() const {
+    if (!char_table) {
+        throw std::runtime_error("No alphabet set; call fit_alphabet or set_alphabet first");
+    }
+    return char_table;
+}
+
+std::vector<int64_t> NgramTokenizer::encode_ngrams(const std::string& text) const {
+    return encode_ngrams(text, *alphabet_table());
+}
+
+std::vector<int64_t> NgramTokenizer::encode_ngrams(const std::string& text, const Alphabet& table) const {
+    std::string normalized = normalize_text(text);
+    std::vector<size_t> positions = char_positions(normalized);
+    std::vector<int64_t> ids;
+    if (positions.size() < n_size) {
+        return ids;
+    }
+    
+    // Map each character to its alphabet index, falling back to 0. Single-byte
+    // characters use the direct table; the rest are looked up in place
+    std::string_view view(normalized);
+    std::vector<int64_t> digits(positions.size());
+    for (size_t i = 0; i < positions.size(); ++i) {
+        size_t start = positions[i];
+        auto lead = static_cast<unsigned char>(normalized[start]);
+        size_t len = utf8_char_length(lead);
+        if (len == 1) {
+            digits[i] = table.byte_index[lead];
+            continue;
+        }
+        auto it = table.char_to_index.find(view.substr(start, len));
+        digits[i] = (it != table.char_to_index.end()) ? it->second : 0;
+    }
+    
+    // Rolling base-B value over a window of n characters
+    int64_t base = static_cast<int64_t>(table.index_to_char.size());
+    int64_t top = table.id_space / base;
+    int64_t id = 0;
+    for (size_t i = 0; i < n_size; ++i) {
+        id = id * base + digits[i];
+    }
+    ids.reserve(positions.size() - n_size + 1);
+    ids.push_back(id);
+    for (size_t i = n_size; i < digits.size(); ++i) {
+        id = (id - digits[i - n_size] * top) * base + digits[i];
+        ids.push_back(id);
+    }
+    
+    return ids;
+}
+
+std::vector<int64_t> NgramTokenizer::encode_text(const std::string& json_line) const {
+    return encode_text(json_line, *alphabet_table());
+}
+
+std::vector<int64_t> NgramTokenizer::encode_text(const std::string& json_line, const Alphabet& table) const {
+    json j = json::parse(json_line);
+    return encode_ngrams(j["text"].get<std::string>(), table);
+}
+
+std::string NgramTokenizer::decode_id(int64_t id) const {
+    auto table = alphabet_table();
+    if (id < 0 || id >= table->id_space) {
+        throw std::out_of_range("N-gram ID out of range: " + std::to_string(id));
+    }
+    
+    // Peel off base-B digits, least significant (last character) first
+    const auto& index_to_char = table->index_to_char;
+    int64_t base = static_cast<int64_t>(index_to_char.size());
+    std::vector<int64_t> digits(n_size);
+    for (size_t i = n_size; i-- > 0; ) {
+        digits[i] = id % base;
+        id /= base;
+    }
+    
+    std::string ngram;
+    for (auto digit : digits) {
+        ngram += index_to_char[digit];
+    }
+    return ngram;
 }
 
 std::vector<std::string> NgramTokenizer::tokenize_text(const std::string& json_line) {
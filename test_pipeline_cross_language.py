@@ -2,6 +2,8 @@
 USES GRADIENT DESCENT
 """
 import sys
+import random
+from itertools import islice
 from pathlib import Path
 import json
 import spacy
@@ -9,6 +11,7 @@ from spacy.tokens import Doc
 from spacy.language import Language
 from spacy.training import Example
 from spacy.pipeline import TextCategorizer
+from spacy.util import minibatch, compounding
 import numpy as np
 
 def find_cpp_module():
@@ -36,8 +39,32 @@ def load_jsonl(file_path):
                 continue
     return data
 
-def create_custom_pipeline(train_data):
-    """Create a spaCy pipeline with custom n-gram tokenizer"""
+def make_review_doc(nlp, review):
+    """Create a Doc for a review, carrying its id and label in user_data"""
+    doc = nlp.make_doc(review["text"])
+    doc.user_data["id"] = review["id"]
+    doc.user_data["label"] = review["label"]
+    return doc
+
+def iter_examples(nlp, reviews):
+    """Lazily build training Examples so only one batch exists at a time"""
+    for review in reviews:
+        doc = make_review_doc(nlp, review)
+        
+        # Convert binary labels to categories
+        cats = {"POSITIVE": review["label"] == 1, "NEGATIVE": review["label"] == 0}
+        yield Example.from_dict(doc, {"cats": cats})
+
+def create_custom_pipeline(train_data, n_iter=10, batch_start=4.0, batch_stop=32.0,
+                           batch_compound=1.001, dropout=0.2, dev_data=None,
+                           patience=None, eval_batch_size=256, seed=0):
+    """Create a spaCy pipeline with custom n-gram tokenizer
+    
+    Trains on shuffled mini-batches whose size compounds from batch_start to
+    batch_stop. With patience set, training stops after that many epochs
+    without improvement (dev accuracy if dev_data is given, else mean
+    training loss per batch) and the best weights are restored.
+    """
     # Import cpp module
     import cpp_ngram
     
@@ -58,9 +85,10 @@ def create_custom_pipeline(train_data):
                 "label": doc.user_data.get('label', 0)
             }
             
-            # Convert to JSON string and get n-grams
+            # Convert to JSON string and get n-grams, sharing str objects
+            # for repeated n-grams across every doc in the corpus
             json_str = json.dumps(json_input)
-            ngrams = cpp_tokenizer.tokenize_text(json_str)
+            ngrams = cpp_tokenizer.tokenize_text(json_str, intern=True)
             
             # Store n-grams as custom doc attribute
             if not Doc.has_extension("ngrams"):
@@ -86,30 +114,78 @@ def create_custom_pipeline(train_data):
     textcat.add_label("POSITIVE")
     textcat.add_label("NEGATIVE")
     
-    # Prepare training examples
-    examples = []
-    for review in train_data:
-        doc = nlp.make_doc(review["text"])
-        doc.user_data["id"] = review["id"]
-        doc.user_data["label"] = review["label"]
-        
-        # Convert binary labels to categories
-        cats = {"POSITIVE": review["label"] == 1, "NEGATIVE": review["label"] == 0}
-        example = Example.from_dict(doc, {"cats": cats})
-        examples.append(example)
-    
-    # Initialize the model
-    optimizer = nlp.initialize(lambda: examples)
+    # Initialize the model from a small sample of streamed examples
+    optimizer = nlp.initialize(lambda: islice(iter_examples(nlp, train_data), 100))
     
-    # Train for a few iterations
+    # Train on shuffled, compounding mini-batches
     print("Training the model...")
-    for i in range(10):
+    rng = random.Random(seed)
+    train_data = list(train_data)  # shuffle a copy, not the caller's list
+    batch_sizes = compounding(batch_start, batch_stop, batch_compound)
+    best_metric = None
+    best_weights = None
+    stale_epochs = 0
+    for i in range(n_iter):
+        rng.shuffle(train_data)
         losses = {}
-        nlp.update(examples, sgd=optimizer, losses=losses)
-        print(f"Iteration {i+1}, Losses:", losses)
+        n_batches = 0
+        for batch in minibatch(train_data, size=batch_sizes):
+            examples = list(iter_examples(nlp, batch))
+            nlp.update(examples, sgd=optimizer, drop=dropout, losses=losses)
+            n_batches += 1
+        
+        if dev_data:
+            scores, labels = predict_scores(nlp, dev_data, batch_size=eval_batch_size)
+            metric, _ = evaluate_predictions(scores, labels)
+            print(f"Iteration {i+1}, Losses: {losses}, Dev accuracy: {metric:.3f}")
+        else:
+            # The textcat loss is a sum of per-batch means and batches grow
+            # each epoch, so compare the mean loss per batch instead
+            metric = -losses.get("textcat", 0.0) / max(n_batches, 1)
+            print(f"Iteration {i+1}, Losses:", losses)
+        
+        if patience is None:
+            continue
+        if best_metric is None or metric > best_metric:
+            best_metric = metric
+            best_weights = nlp.get_pipe("textcat").to_bytes()
+            stale_epochs = 0
+        else:
+            stale_epochs += 1
+            if stale_epochs >= patience:
+                print(f"No improvement for {patience} iterations, stopping early")
+                break
+    
+    if best_weights is not None:
+        nlp.get_pipe("textcat").from_bytes(best_weights)
     
     return nlp
 
+def predict_scores(nlp, reviews, batch_size=256, show=0):
+    """Score reviews through nlp.pipe, keeping only the scores and labels
+    
+    Details are printed for the first `show` reviews.
+    """
+    predictions = []
+    actual_labels = []
+    docs = (make_review_doc(nlp, review) for review in reviews)
+    for i, (review, doc) in enumerate(zip(reviews, nlp.pipe(docs, batch_size=batch_size))):
+        pred_score = doc.cats["POSITIVE"]
+        predictions.append(pred_score)
+        actual_labels.append(review["label"])
+        
+        if i < show:
+            print(f"\nReview {i+1}:")
+            print(f"ID: {review['id']}")
+            print(f"Original label: {review['label']}")
+            print(f"Predicted score: {pred_score:.3f}")
+            print(f"Number of n-grams: {len(doc._.ngrams)}")
+            if doc._.ngrams:
+                print(f"Sample n-grams: {doc._.ngrams[:5]}")
+            print(f"Text preview: {review['text'][:100]}...")
+    
+    return predictions, actual_labels
+
 def evaluate_predictions(predictions, actual_labels):
     """Calculate accuracy and confusion matrix"""
     correct = sum(1 for pred, actual in zip(predictions, actual_labels) 
@@ -139,37 +215,19 @@ def main():
     print(f"Loaded {len(train_data)} Spanish training reviews")
     print(f"Loaded {len(test_data)} English test reviews")
     
+    # Hold out a Spanish dev split for early stopping
+    random.Random(0).shuffle(train_data)
+    n_dev = len(train_data) // 10
+    dev_data, train_data = train_data[:n_dev], train_data[n_dev:]
+    
     # Create and train pipeline
-    nlp = create_custom_pipeline(train_data)
+    # Too few reviews leave an empty split; fall back to training-loss early stopping
+    nlp = create_custom_pipeline(train_data, n_iter=10, dev_data=dev_data or None, patience=3)
     print("Pipeline created:", nlp.pipe_names)
     
-    # Test on English reviews
-    predictions = []
-    actual_labels = []
-    
+    # Test on all English reviews
     print("\nTesting on English reviews...")
-    for i, review in enumerate(test_data[:10]):  # Test on first 10 reviews
-        doc = nlp.make_doc(review["text"])
-        doc.user_data["id"] = review["id"]
-        doc.user_data["label"] = review["label"]
-        
-        # Process through pipeline
-        doc = nlp(doc)
-        
-        # Get prediction
-        cats = doc.cats
-        pred_score = cats["POSITIVE"]
-        predictions.append(pred_score)
-        actual_labels.append(review["label"])
-        
-        print(f"\nReview {i+1}:")
-        print(f"ID: {review['id']}")
-        print(f"Original label: {review['label']}")
-        print(f"Predicted score: {pred_score:.3f}")
-        print(f"Number of n-grams: {len(doc._.ngrams)}")
-        if doc._.ngrams:
-            print(f"Sample n-grams: {doc._.ngrams[:5]}")
-        print(f"Text preview: {review['text'][:100]}...")
+    predictions, actual_labels = predict_scores(nlp, test_data, batch_size=256, show=10)
     
     # Calculate and print metrics
     accuracy, (tp, fp, tn, fn) = evaluate_predictions(predictions, actual_labels)